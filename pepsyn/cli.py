@@ -45,6 +45,7 @@ from pepsyn.codons import (
     zero_low_freq_codons,
     zero_non_amber_stops,
 )
+from pepsyn.error import PepsynError
 from pepsyn.operations import ctermpep as cterm_oligo
 from pepsyn.operations import (
     disambiguate_iupac_aa,
@@ -52,7 +53,7 @@ from pepsyn.operations import (
     orf_stats,
     pad_ggsg,
     recode_site_from_cds,
-    recode_sites_from_cds,
+    recode_sites_from_cds_batch,
     reverse_translate,
 )
 from pepsyn.operations import tile as tile_op
@@ -62,6 +63,9 @@ from pepsyn.util import readfq, site2dna, sliding_window
 # biopython has a bunch of annoying warnings bc Seq comparisons changed
 captureWarnings(True)
 
+# number of records recodesite scans for sites in one pass
+_RECODESITE_BATCH_SIZE = 4096
+
 
 def print_fasta(sr, out):
     print(">{}\n{}".format(sr.id, str(sr.seq)), file=out)
@@ -417,14 +421,32 @@ def recodesite(
     sites = [site2dna(s) for s in site]
     # sites is now a list[Bio.Seq.Seq]
 
-    for seqrecord in SeqIO.parse(input, "fasta"):
-        id_ = seqrecord.id
-        cds_start = clip_left
-        cds_end = len(seqrecord) - clip_right
-        seq = recode_sites_from_cds(
-            seqrecord.seq, sites, codon_sampler, cds_start, cds_end
+    def recode_batch(batch):
+        seqs = recode_sites_from_cds_batch(
+            [seqrecord.seq for seqrecord in batch],
+            sites,
+            codon_sampler,
+            [clip_left] * len(batch),
+            [len(seqrecord) - clip_right for seqrecord in batch],
         )
-        print_fasta(SeqRecord(seq, id_, description=""), output)
+        for (seqrecord, seq) in zip(batch, seqs):
+            print_fasta(SeqRecord(seq, seqrecord.id, description=""), output)
+
+    # recode in fixed-size batches so output streams as input is read; CDS
+    # lengths are checked while reading so every record before a bad one is
+    # still written
+    batch = []
+    for seqrecord in SeqIO.parse(input, "fasta"):
+        if (len(seqrecord) - clip_right - clip_left) % 3 != 0:
+            recode_batch(batch)
+            raise PepsynError(
+                "CDS length of {} is not multiple of 3".format(seqrecord.id)
+            )
+        batch.append(seqrecord)
+        if len(batch) == _RECODESITE_BATCH_SIZE:
+            recode_batch(batch)
+            batch = []
+    recode_batch(batch)
 
 
 @cli.command(short_help="replace Xs with linker")
@@ -12,8 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import warnings
-from copy import copy
 from itertools import product
 from math import fsum
 
@@ -28,22 +26,27 @@ opal_codon = Seq("TGA", unambiguous_dna)
 
 
 class CodonUsage(object):
-    def __init__(self, weights):
+    def __init__(self, weights, nucleotide_alphabet=None):
         """weights is a dict of Seq('NNN', alphabet) -> float mappings
 
         weights does not need to be normalized, but must include all 64 codons
+
+        weights may also be keyed by str codons, in which case
+        nucleotide_alphabet must be given. freq is always keyed by str, which
+        avoids hashing Seq objects.
         """
-        self.nucleotide_alphabet = weights.keys().__iter__().__next__().alphabet
+        if nucleotide_alphabet is None:
+            nucleotide_alphabet = weights.keys().__iter__().__next__().alphabet
+        self.nucleotide_alphabet = nucleotide_alphabet
 
         # verify presence of all 64 codons
         all_64 = {
-            Seq("".join(x), self.nucleotide_alphabet)
-            for x in product(self.nucleotide_alphabet.letters, repeat=3)
+            "".join(x) for x in product(self.nucleotide_alphabet.letters, repeat=3)
         }
-        if all_64 != set(weights.keys()):
+        self.freq = {str(codon): weight for (codon, weight) in weights.items()}
+        if all_64 != set(self.freq.keys()):
             raise ValueError("values must include all 64 codons")
 
-        self.freq = copy(weights)
         self._renormalize_weights()
 
     def _renormalize_weights(self):
@@ -58,23 +61,52 @@ def zero_non_amber_stops(usage):
     """Returns CodonUsage that zeros-out non-amber stop codons"""
     # TODO: it doesn't take into account alphabet
     freq = usage.freq.copy()
-    freq[ochre_codon] = 0.0
-    freq[opal_codon] = 0.0
-    return CodonUsage(freq)
+    freq[str(ochre_codon)] = 0.0
+    freq[str(opal_codon)] = 0.0
+    return CodonUsage(freq, usage.nucleotide_alphabet)
 
 
 def zero_low_freq_codons(usage, table, freq_threshold=0.01):
     """Returns CodonUsage that zeros low-freq codons unless the AA is elim"""
     freq = usage.freq.copy()
-    common_codons = {str(c) for (c, f) in freq.items() if f >= freq_threshold}
+    common_codons = {c for (c, f) in freq.items() if f >= freq_threshold}
     for aa in table.protein_alphabet.letters + "*":
         curr_codons = {c for (c, a) in table.forward_table.items() if a == aa}
         if len(common_codons & curr_codons) == 0:
             continue
         rare_codons = curr_codons - common_codons
         for c in rare_codons:
-            freq[Seq(c, unambiguous_dna)] = 0.0
-    return CodonUsage(freq)
+            freq[c] = 0.0
+    return CodonUsage(freq, usage.nucleotide_alphabet)
+
+
+def alias_table(p):
+    """Walker alias table for sampling from a discrete distribution
+
+    p is an array of probabilities summing to 1
+
+    Returns (prob, alias) arrays built with Vose's method. To sample, draw a
+    uniform index i and keep it with probability prob[i], otherwise take
+    alias[i].
+    """
+    n = len(p)
+    scaled = np.asarray(p, dtype=float) * n
+    prob = np.ones(n)
+    alias = np.arange(n)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        i = small.pop()
+        j = large.pop()
+        prob[i] = scaled[i]
+        alias[i] = j
+        scaled[j] = scaled[j] + scaled[i] - 1.0
+        if scaled[j] < 1.0:
+            small.append(j)
+        else:
+            large.append(j)
+    # any leftovers have scaled prob of 1 up to rounding error
+    return (prob, alias)
 
 
 class CodonSampler(object):
@@ -93,6 +125,23 @@ class CodonSampler(object):
         for codon in self.table.stop_codons:
             c = Seq(codon, self.table.nucleotide_alphabet)
             self.aa2codons.setdefault("*", []).append(c)
+        # dense tables indexed by ASCII amino acid: the bytes of each
+        # synonymous codon and how many there are
+        max_synonyms = max(len(codons) for codons in self.aa2codons.values())
+        self.syn = np.zeros((128, max_synonyms, 3), dtype=np.uint8)
+        self.syn_counts = np.zeros(128, dtype=np.uint8)
+        for (aa, codons) in self.aa2codons.items():
+            self.syn_counts[ord(aa)] = len(codons)
+            for (i, codon) in enumerate(codons):
+                self.syn[ord(aa), i] = np.frombuffer(
+                    str(codon).encode("ascii"), dtype=np.uint8
+                )
+        # bytes of the modal codon of each amino acid (see modal_codon)
+        self.modal_codons = self.syn[:, 0].copy()
+        # alias table per amino acid over its synonymous codons; samplers
+        # that fill these in get vectorized sample_codons (see alias_table)
+        self.syn_prob = None
+        self.syn_alias = None
 
     def sample_codon(self, aa):
         """
@@ -100,6 +149,37 @@ class CodonSampler(object):
         """
         raise NotImplementedError()
 
+    def modal_codon(self, aa):
+        """most likely codon for aa; the first one if all are equally likely
+
+        aa is str for single-letter IUPAC AA
+        """
+        return self.aa2codons[aa][0]
+
+    def sample_codons(self, aas):
+        """
+        aas is uint8 array of ASCII single-letter IUPAC AAs
+
+        returns (len(aas), 3) uint8 array with an independently sampled codon
+        for each AA
+
+        Falls back to calling sample_codon for each AA unless the sampler
+        provides syn_prob and syn_alias tables.
+        """
+        if self.syn_prob is None:
+            codons = [str(self.sample_codon(aa)) for aa in aas.tobytes().decode()]
+            codons = "".join(codons).encode("ascii")
+            return np.frombuffer(codons, dtype=np.uint8).reshape(-1, 3)
+        counts = self.syn_counts[aas]
+        if (counts == 0).any():
+            raise ValueError(
+                "{} is not in the codon table".format(chr(aas[counts == 0][0]))
+            )
+        idxs = (np.random.random_sample(len(aas)) * counts).astype(np.intp)
+        rejected = np.random.random_sample(len(aas)) >= self.syn_prob[aas, idxs]
+        idxs[rejected] = self.syn_alias[aas[rejected], idxs[rejected]]
+        return self.syn[aas, idxs]
+
 
 class UniformCodonSampler(CodonSampler):
     def __init__(self, table=None):
@@ -107,6 +187,9 @@ class UniformCodonSampler(CodonSampler):
         table is Bio.Data.CodonTable.NCBICodonTableDNA
         """
         super().__init__(table)
+        max_synonyms = self.syn.shape[1]
+        self.syn_prob = np.ones((128, max_synonyms))
+        self.syn_alias = np.tile(np.arange(max_synonyms), (128, 1))
 
     def sample_codon(self, aa):
         i = np.random.randint(len(self.aa2codons[aa]))
@@ -126,90 +209,106 @@ class FreqWeightedCodonSampler(CodonSampler):
         if self.table.nucleotide_alphabet != self.usage.nucleotide_alphabet:
             raise ValueError("table and usage need to use the same nucleotide Alphabet")
 
-        # precalculate amino acid distributions (incl stop codon)
+        # precalculate amino acid distributions (incl stop codon) and their
+        # alias tables for constant-time sampling
         self.aa2p = {}
+        self.aa2alias = {}
+        max_synonyms = self.syn.shape[1]
+        self.syn_prob = np.ones((128, max_synonyms))
+        self.syn_alias = np.tile(np.arange(max_synonyms), (128, 1))
         for aa in self.table.protein_alphabet.letters + "*":
-            unnormed = np.asarray([self.usage.freq[c] for c in self.aa2codons[aa]])
+            unnormed = np.asarray([self.usage.freq[str(c)] for c in self.aa2codons[aa]])
             self.aa2p[aa] = unnormed / unnormed.sum()
+            self.aa2alias[aa] = alias_table(self.aa2p[aa])
+            (prob, alias) = self.aa2alias[aa]
+            self.syn_prob[ord(aa), : len(prob)] = prob
+            self.syn_alias[ord(aa), : len(alias)] = alias
+            self.modal_codons[ord(aa)] = self.syn[ord(aa), np.argmax(self.aa2p[aa])]
 
     def sample_codon(self, aa):
         """
         aa is str for single-letter IUPAC AA
         """
-        i = np.random.choice(range(len(self.aa2codons[aa])), p=self.aa2p[aa])
+        (prob, alias) = self.aa2alias[aa]
+        i = np.random.randint(len(prob))
+        if np.random.random_sample() >= prob[i]:
+            i = alias[i]
         return self.aa2codons[aa][i]
 
+    def modal_codon(self, aa):
+        """
+        aa is str for single-letter IUPAC AA
+        """
+        return self.aa2codons[aa][np.argmax(self.aa2p[aa])]
 
-with warnings.catch_warnings():
-    # to supress biopythons warnings on hashing Seq objects
-    warnings.simplefilter("ignore")
-
-    # http://www.kazusa.or.jp/codon/cgi-bin/showcodon.cgi?species=37762
-    ecoli_codon_usage = CodonUsage(
-        {
-            Seq("GGG", unambiguous_dna): 12.32,
-            Seq("GGA", unambiguous_dna): 13.61,
-            Seq("GGT", unambiguous_dna): 23.72,
-            Seq("GGC", unambiguous_dna): 20.58,
-            Seq("GAG", unambiguous_dna): 19.37,
-            Seq("GAA", unambiguous_dna): 35.06,
-            Seq("GAT", unambiguous_dna): 33.75,
-            Seq("GAC", unambiguous_dna): 17.86,
-            Seq("GTG", unambiguous_dna): 19.87,
-            Seq("GTA", unambiguous_dna): 13.07,
-            Seq("GTT", unambiguous_dna): 21.56,
-            Seq("GTC", unambiguous_dna): 13.09,
-            Seq("GCG", unambiguous_dna): 21.09,
-            Seq("GCA", unambiguous_dna): 23.00,
-            Seq("GCT", unambiguous_dna): 18.89,
-            Seq("GCC", unambiguous_dna): 21.63,
-            Seq("AGG", unambiguous_dna): 3.96,
-            Seq("AGA", unambiguous_dna): 7.11,
-            Seq("AGT", unambiguous_dna): 13.19,
-            Seq("AGC", unambiguous_dna): 14.27,
-            Seq("AAG", unambiguous_dna): 15.30,
-            Seq("AAA", unambiguous_dna): 37.21,
-            Seq("AAT", unambiguous_dna): 29.32,
-            Seq("AAC", unambiguous_dna): 20.26,
-            Seq("ATG", unambiguous_dna): 23.75,
-            Seq("ATA", unambiguous_dna): 13.33,
-            Seq("ATT", unambiguous_dna): 29.58,
-            Seq("ATC", unambiguous_dna): 19.40,
-            Seq("ACG", unambiguous_dna): 13.64,
-            Seq("ACA", unambiguous_dna): 15.14,
-            Seq("ACT", unambiguous_dna): 13.09,
-            Seq("ACC", unambiguous_dna): 18.94,
-            Seq("TGG", unambiguous_dna): 13.39,
-            Seq("TGA", unambiguous_dna): 1.15,
-            Seq("TGT", unambiguous_dna): 5.86,
-            Seq("TGC", unambiguous_dna): 5.48,
-            Seq("TAG", unambiguous_dna): 0.32,
-            Seq("TAA", unambiguous_dna): 2.00,
-            Seq("TAT", unambiguous_dna): 21.62,
-            Seq("TAC", unambiguous_dna): 11.69,
-            Seq("TTG", unambiguous_dna): 12.91,
-            Seq("TTA", unambiguous_dna): 17.43,
-            Seq("TTT", unambiguous_dna): 24.36,
-            Seq("TTC", unambiguous_dna): 13.95,
-            Seq("TCG", unambiguous_dna): 8.18,
-            Seq("TCA", unambiguous_dna): 13.09,
-            Seq("TCT", unambiguous_dna): 13.08,
-            Seq("TCC", unambiguous_dna): 9.71,
-            Seq("CGG", unambiguous_dna): 7.91,
-            Seq("CGA", unambiguous_dna): 4.81,
-            Seq("CGT", unambiguous_dna): 15.93,
-            Seq("CGC", unambiguous_dna): 14.04,
-            Seq("CAG", unambiguous_dna): 26.74,
-            Seq("CAA", unambiguous_dna): 14.42,
-            Seq("CAT", unambiguous_dna): 12.41,
-            Seq("CAC", unambiguous_dna): 7.34,
-            Seq("CTG", unambiguous_dna): 37.44,
-            Seq("CTA", unambiguous_dna): 5.56,
-            Seq("CTT", unambiguous_dna): 14.51,
-            Seq("CTC", unambiguous_dna): 9.47,
-            Seq("CCG", unambiguous_dna): 14.50,
-            Seq("CCA", unambiguous_dna): 9.11,
-            Seq("CCT", unambiguous_dna): 9.49,
-            Seq("CCC", unambiguous_dna): 6.17,
-        }
-    )
+
+# http://www.kazusa.or.jp/codon/cgi-bin/showcodon.cgi?species=37762
+ecoli_codon_usage = CodonUsage(
+    {
+        "GGG": 12.32,
+        "GGA": 13.61,
+        "GGT": 23.72,
+        "GGC": 20.58,
+        "GAG": 19.37,
+        "GAA": 35.06,
+        "GAT": 33.75,
+        "GAC": 17.86,
+        "GTG": 19.87,
+        "GTA": 13.07,
+        "GTT": 21.56,
+        "GTC": 13.09,
+        "GCG": 21.09,
+        "GCA": 23.00,
+        "GCT": 18.89,
+        "GCC": 21.63,
+        "AGG": 3.96,
+        "AGA": 7.11,
+        "AGT": 13.19,
+        "AGC": 14.27,
+        "AAG": 15.30,
+        "AAA": 37.21,
+        "AAT": 29.32,
+        "AAC": 20.26,
+        "ATG": 23.75,
+        "ATA": 13.33,
+        "ATT": 29.58,
+        "ATC": 19.40,
+        "ACG": 13.64,
+        "ACA": 15.14,
+        "ACT": 13.09,
+        "ACC": 18.94,
+        "TGG": 13.39,
+        "TGA": 1.15,
+        "TGT": 5.86,
+        "TGC": 5.48,
+        "TAG": 0.32,
+        "TAA": 2.00,
+        "TAT": 21.62,
+        "TAC": 11.69,
+        "TTG": 12.91,
+        "TTA": 17.43,
+        "TTT": 24.36,
+        "TTC": 13.95,
+        "TCG": 8.18,
+        "TCA": 13.09,
+        "TCT": 13.08,
+        "TCC": 9.71,
+        "CGG": 7.91,
+        "CGA": 4.81,
+        "CGT": 15.93,
+        "CGC": 14.04,
+        "CAG": 26.74,
+        "CAA": 14.42,
+        "CAT": 12.41,
+        "CAC": 7.34,
+        "CTG": 37.44,
+        "CTA": 5.56,
+        "CTT": 14.51,
+        "CTC": 9.47,
+        "CCG": 14.50,
+        "CCA": 9.11,
+        "CCT": 9.49,
+        "CCC": 6.17,
+    },
+    unambiguous_dna,
+)
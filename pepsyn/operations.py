@@ -18,8 +18,16 @@ This module should generally operate on Bio.Seq.Seq objects.
 """
 
 import re
-from itertools import cycle
-
+from collections import Counter
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+from Bio.Data.CodonTable import (
+    ambiguous_dna_by_id,
+    standard_dna_table,
+    unambiguous_dna_by_id,
+)
 from Bio.Data.IUPACData import (
     ambiguous_dna_values,
     protein_letters,
@@ -42,6 +50,41 @@ ambiguous_protein_values = {
 extended_protein_letters = "".join(ambiguous_protein_values.keys())
 extended_dna_letters = set(ambiguous_dna_values.keys()) - set(unambiguous_dna_letters)
 
+# 2-bit codes for unambiguous nucleotides; everything else maps to 4
+_NT_CODES = np.full(256, 4, dtype=np.uint64)
+_NT_CODES[[ord(nt) for nt in "ACGT"]] = np.arange(4)
+
+# number of times to resample a site's codons before giving up
+_MAX_RECODE_ATTEMPTS = 1000
+
+# regex alternation scales with the number of sites; past this many sites,
+# search with packed nucleotide windows instead
+_PACKED_SEARCH_MIN_SITES = 64
+
+
+# Seq.__init__ only type-checks its str data and stores it with the alphabet;
+# when the installed biopython lays out Seq like that, set the attributes
+# directly instead of going through the constructor for every returned seq
+_FAST_SEQ = not hasattr(Seq, "__slots__") and (
+    set(vars(Seq(""))) == {"_data", "alphabet"}
+)
+
+
+def _like(seq, data):
+    """wrap raw str data in the same type as seq
+
+    seq is a Bio.Seq.Seq or str; the operations below work on the underlying
+    str and only build a Bio.Seq.Seq for their return values
+    """
+    if isinstance(seq, Seq):
+        if _FAST_SEQ:
+            wrapped = object.__new__(Seq)
+            wrapped._data = data
+            wrapped.alphabet = seq.alphabet
+            return wrapped
+        return Seq(data, seq.alphabet)
+    return data
+
 
 def tile(seq, length, overlap):
     """Generator of tiles with specified length across a sequence
@@ -50,7 +93,7 @@ def tile(seq, length, overlap):
     segments at the end of the sequence.  Sequence must be at least as long as
     tile length
 
-    seq is a Bio.Seq.Seq
+    seq is a Bio.Seq.Seq or str; tiles are the same type
     length, overlap are int
     """
     if length <= 0:
@@ -59,15 +102,49 @@ def tile(seq, length, overlap):
         raise ValueError("overlap must be a nonnegative integer")
     if overlap >= length:
         raise ValueError("length must be greater than overlap")
-    seqlen = len(seq)
+    data = str(seq)
+    seqlen = len(data)
     end = length
     while end < seqlen:
         start = end - length
-        yield (start, end, seq[start:end])
+        yield (start, end, _like(seq, data[start:end]))
         end += length - overlap
     if end == seqlen:
         start = end - length
-        yield (start, end, seq[start:end])
+        yield (start, end, _like(seq, data[start:end]))
+
+
+def tile_and_translate(seq, length, overlap, table=None):
+    """Generator of translated tiles across a coding DNA sequence
+
+    Yields the same tiles as `tile`, translated. The sequence is translated
+    once and the peptides are sliced from the translation, so length and
+    overlap must be multiples of 3 to keep every tile in frame.
+
+    seq is a Bio.Seq.Seq or str; peptides are the same type
+    length, overlap are int (nucleotides)
+    table is Bio.Data.CodonTable.NCBICodonTableDNA; defaults to standard table;
+        IUPAC ambiguity codes are translated with the matching ambiguous table
+    yields (start, end, peptide) with start, end in nucleotide coords
+    """
+    if length % 3 != 0 or overlap % 3 != 0:
+        raise ValueError("length and overlap must be multiples of 3")
+    table = table if table is not None else standard_dna_table
+    data = str(seq)
+    data = data[: len(data) - len(data) % 3]
+    translation = _translate(data, table)
+    if translation is None:
+        # ambiguous codons translate through the matching ambiguous table
+        ambiguous_table = ambiguous_dna_by_id[table.id]
+        translation = str(
+            Seq(data, ambiguous_table.nucleotide_alphabet).translate(
+                table=ambiguous_table
+            )
+        )
+    for (start, end, peptide) in tile(translation, length // 3, overlap // 3):
+        if isinstance(seq, Seq):
+            peptide = Seq(peptide, table.protein_alphabet)
+        yield (3 * start, 3 * end, peptide)
 
 
 def ctermpep(seq, length, add_stop=False):
@@ -78,11 +155,12 @@ def ctermpep(seq, length, add_stop=False):
 
     If length is bigger than seq, it will return the entire seq
 
-    seq is a Bio.Seq.Seq
+    seq is a Bio.Seq.Seq or str; return value is the same type
     """
+    data = str(seq)
     if add_stop:
-        seq += "*"
-    return seq[-length:]
+        data += "*"
+    return _like(seq, data[-length:])
 
 
 def reverse_translate(seq, codon_sampler):
@@ -90,57 +168,114 @@ def reverse_translate(seq, codon_sampler):
     seq is a Bio.Seq.Seq
     codon_sampler is a CodonSampler
     """
-    codons = []
-    for aa in seq:
-        codons.append(codon_sampler.sample_codon(aa))
-    return sum(codons, Seq("", codon_sampler.nucleotide_alphabet))
+    aas = np.frombuffer(str(seq).encode("ascii"), dtype=np.uint8)
+    codons = codon_sampler.sample_codons(aas)
+    return Seq(codons.tobytes().decode("ascii"), codon_sampler.nucleotide_alphabet)
+
+
+def reverse_translate_deterministic(seq, codon_sampler):
+    """reverse translate using the most likely codon for every amino acid
+
+    seq is a Bio.Seq.Seq
+    codon_sampler is a CodonSampler
+    """
+    aas = np.frombuffer(str(seq).encode("ascii"), dtype=np.uint8)
+    unknown = codon_sampler.syn_counts[aas] == 0
+    if unknown.any():
+        raise ValueError("{} is not in the codon table".format(chr(aas[unknown][0])))
+    codons = codon_sampler.modal_codons[aas]
+    return Seq(codons.tobytes().decode("ascii"), codon_sampler.nucleotide_alphabet)
+
+
+# precomputed GGSG linker; long enough for most stretches of Xs and pads
+_GGSG = b"GGSG" * 16
 
 
-def _ggsg_generator():
-    """generates infinite sequence of 'G', 'G', 'S', 'G'"""
-    for aa in cycle("GGSG"):
-        yield aa
+def _ggsg(n):
+    """first n residues of the repeating GGSG linker as bytes"""
+    if n <= len(_GGSG):
+        return _GGSG[:n]
+    return (b"GGSG" * (n // 4 + 1))[:n]
 
 
 def x_to_ggsg(seq):
     """replace Xs with a Serine-Glycine linker (GGSG pattern)
 
-    seq and return value are strings
+    Each stretch of Xs is replaced by a linker that restarts at its first
+    position.
+
+    seq is a Bio.Seq.Seq or str; return value is the same type
     """
-    if "X" not in seq:
+    data = str(seq)
+    if "X" not in data:
         return seq
-    replacement = []
-    ggsg = _ggsg_generator()
-    for aa in seq:
-        if aa != "X":
-            replacement.append(aa)
-            # restart linker iterator for next stretch of Xs
-            ggsg = _ggsg_generator()
-        else:
-            replacement.append(next(ggsg))
-    return "".join(replacement)
+    mask = np.frombuffer(data.encode("ascii"), dtype=np.uint8) == ord("X")
+    # alternating start/end coords of each stretch of Xs
+    bounds = np.flatnonzero(np.diff(np.r_[0, mask.view(np.int8), 0]))
+    replacement = bytearray(data, "ascii")
+    for (start, end) in bounds.reshape(-1, 2).tolist():
+        replacement[start:end] = _ggsg(end - start)
+    return _like(seq, replacement.decode("ascii"))
 
 
 def pad_ggsg(seq, length, terminus="C"):
     """pad seq with Serine-Glycine linker (GGSG pattern)
 
-    seq and return are Bio.Seq.Seq
+    seq is a Bio.Seq.Seq or str; return value is the same type
     """
-    if len(seq) >= length:
+    data = str(seq)
+    if len(data) >= length:
         return seq
-    ggsg = _ggsg_generator()
-    pad = "".join([next(ggsg) for _ in range(length - len(seq))])
+    pad = _ggsg(length - len(data)).decode("ascii")
     if terminus == "C":
-        return seq + pad
+        return _like(seq, data + pad)
     elif terminus == "N":
-        return pad + seq
+        return _like(seq, pad + data)
     else:
         raise ValueError('terminus must be "N" or "C"')
 
 
+def _letter_pools(ambiguous_letters, disambiguation):
+    """dict from each ambiguous letter to the tuple of its unambiguous letters"""
+    return {letter: tuple(disambiguation[letter]) for letter in ambiguous_letters}
+
+
+_protein_pools = _letter_pools(extended_protein_letters, ambiguous_protein_values)
+_dna_pools = _letter_pools(extended_dna_letters, ambiguous_dna_values)
+
+
+def _disambiguate(seq, pools):
+    """generator
+    seq is Bio.Seq.Seq or str; pools is from _letter_pools
+    """
+    data = str(seq)
+    if pools.keys().isdisjoint(data):
+        # nothing to disambiguate, which is by far the most common case
+        yield seq
+        return
+    # the candidate letters at each position; itertools.product then walks
+    # every combination without building intermediate sequences
+    for letters in product(*[pools.get(letter, letter) for letter in data]):
+        yield _like(seq, "".join(letters))
+
+
+def _num_disambiguated(seq, pools):
+    """
+    seq is Bio.Seq.Seq or str; pools is from _letter_pools
+    """
+    counts = np.bincount(
+        np.frombuffer(str(seq).encode("ascii"), dtype=np.uint8), minlength=128
+    )
+    # exponentiate with python ints as the product easily overflows int64
+    n = 1
+    for (letter, pool) in pools.items():
+        n *= len(pool) ** int(counts[ord(letter)])
+    return n
+
+
 def disambiguate_iupac_string(seq, ambiguous_letters, disambiguation):
     """generator
-    seq is Bio.Seq.Seq
+    seq is Bio.Seq.Seq or str; yields the same type
 
     ambiguous_letters is string containing ambiguous IUPAC codes
 
@@ -149,35 +284,21 @@ def disambiguate_iupac_string(seq, ambiguous_letters, disambiguation):
     Bio.Data.IUPACData.ambiguous_dna_values)
 
     """
-    match = re.search("[{}]".format(ambiguous_letters), str(seq))
-    if match is None:
-        yield seq
-    else:
-        idx = match.start()
-        for letter in disambiguation[seq[idx]]:
-            disambiguated = seq[:idx] + letter + seq[idx + 1 :]
-            for s in disambiguate_iupac_string(
-                disambiguated, ambiguous_letters, disambiguation
-            ):
-                yield s
+    yield from _disambiguate(seq, _letter_pools(ambiguous_letters, disambiguation))
 
 
 def disambiguate_iupac_dna(seq):
     """generator
     seq is Bio.Seq.Seq
     """
-    for s in disambiguate_iupac_string(seq, extended_dna_letters, ambiguous_dna_values):
-        yield s
+    yield from _disambiguate(seq, _dna_pools)
 
 
 def disambiguate_iupac_aa(seq):
     """generator
     seq is Bio.Seq.Seq
     """
-    for s in disambiguate_iupac_string(
-        seq, extended_protein_letters, ambiguous_protein_values
-    ):
-        yield s
+    yield from _disambiguate(seq, _protein_pools)
 
 
 def num_disambiguated_iupac_strings(seq, ambiguous_letters, disambiguation):
@@ -190,23 +311,62 @@ def num_disambiguated_iupac_strings(seq, ambiguous_letters, disambiguation):
     strings containing the unambiguous versions (e.g.,
     Bio.Data.IUPACData.ambiguous_dna_values)
     """
-    n = 1
-    for letter in str(seq):
-        if letter in ambiguous_letters:
-            n *= len(disambiguation[letter])
-    return n
+    return _num_disambiguated(seq, _letter_pools(ambiguous_letters, disambiguation))
+
+
+# library design scores the same candidate sequences repeatedly, so the
+# counts are memoized on the str of the sequence
+@lru_cache(maxsize=2 ** 14)
+def _num_disambiguated_dna(data):
+    return _num_disambiguated(data, _dna_pools)
+
+
+@lru_cache(maxsize=2 ** 14)
+def _num_disambiguated_aa(data):
+    return _num_disambiguated(data, _protein_pools)
 
 
 def num_disambiguated_iupac_dna(seq):
-    return num_disambiguated_iupac_strings(
-        seq, extended_dna_letters, ambiguous_dna_values
-    )
+    return _num_disambiguated_dna(str(seq))
 
 
 def num_disambiguated_iupac_aa(seq):
-    return num_disambiguated_iupac_strings(
-        seq, extended_protein_letters, ambiguous_protein_values
-    )
+    return _num_disambiguated_aa(str(seq))
+
+
+@lru_cache(maxsize=16)
+def _codon_lut(table):
+    """lookup table from 2-bit packed codon to ASCII amino acid ('*' for stop)
+
+    table is Bio.Data.CodonTable.NCBICodonTableDNA; ambiguous tables use their
+    unambiguous counterpart, as the lookup only covers ACGT codons
+    """
+    table = unambiguous_dna_by_id[table.id]
+    lut = np.zeros(64, dtype=np.uint8)
+    for (codon, aa) in table.forward_table.items():
+        (i, j, k) = _NT_CODES[[ord(nt) for nt in codon]].tolist()
+        lut[(i << 4) | (j << 2) | k] = ord(aa)
+    for codon in table.stop_codons:
+        (i, j, k) = _NT_CODES[[ord(nt) for nt in codon]].tolist()
+        lut[(i << 4) | (j << 2) | k] = ord("*")
+    return lut
+
+
+def _translate(data, table):
+    """translate whole codons with a single lookup table gather
+
+    data is a str; table is Bio.Data.CodonTable.NCBICodonTableDNA
+
+    returns the translation as a str, or None if data is not made of whole
+    unambiguous codons (use Bio.Seq.Seq.translate for those)
+    """
+    if len(data) % 3 != 0:
+        return None
+    codes = _NT_CODES[np.frombuffer(data.encode("ascii"), dtype=np.uint8)]
+    if (codes > 3).any():
+        return None
+    idxs = (codes[0::3] << 4) | (codes[1::3] << 2) | codes[2::3]
+    return _codon_lut(table)[idxs].tobytes().decode("ascii")
 
 
 def recode(seq, codon_sampler):
@@ -214,11 +374,113 @@ def recode(seq, codon_sampler):
     seq is a Bio.Seq.Seq
     codon_sampler is a CodonSampler
     """
-    translation = seq.translate(table=codon_sampler.table)
+    translation = _translate(str(seq), codon_sampler.table)
+    if translation is None:
+        translation = seq.translate(table=codon_sampler.table)
     recoded = reverse_translate(translation, codon_sampler)
     return recoded
 
 
+@lru_cache(maxsize=128)
+def _sites_pattern(sites):
+    """compiled regex matching any of the sites
+
+    sites is a tuple of str; longer sites are tried first so that a match
+    reports the longest site starting at the leftmost matching position
+    """
+    alternatives = sorted(set(sites), key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, alternatives)))
+
+
+@lru_cache(maxsize=128)
+def _packed_sites(sites):
+    """sites grouped by length as sorted arrays of 2-bit packed codes
+
+    sites is a tuple of str; returns list of (length, codes) by decreasing
+    length, or None if some site is not strict DNA or is too long to pack in
+    a uint64
+    """
+    sites_by_length = {}
+    for site in set(sites):
+        if len(site) > 32 or not set(site) <= set("ACGT"):
+            return None
+        code = 0
+        for nt in site:
+            code = (code << 2) | "ACGT".index(nt)
+        sites_by_length.setdefault(len(site), []).append(code)
+    return [
+        (length, np.sort(np.asarray(codes, dtype=np.uint64)))
+        for (length, codes) in sorted(sites_by_length.items(), reverse=True)
+    ]
+
+
+def _packed_site_hits(data, packed_sites):
+    """generator of (length, start coords of every site of that length in data)
+
+    Every window of each site length is packed into a uint64 code and all
+    windows are looked up in the site codes at once, so the cost does not grow
+    with the number of sites.
+    """
+    codes = _NT_CODES[np.frombuffer(data.encode("ascii"), dtype=np.uint8)]
+    for (length, site_codes) in packed_sites:
+        num_windows = len(codes) - length + 1
+        if num_windows <= 0:
+            continue
+        windows = np.zeros(num_windows, dtype=np.uint64)
+        ambiguous = np.zeros(num_windows, dtype=bool)
+        for i in range(length):
+            column = codes[i : i + num_windows]
+            windows = (windows << 2) | (column & 3)
+            ambiguous |= column > 3
+        yield (length, np.flatnonzero(np.isin(windows, site_codes) & ~ambiguous))
+
+
+def _find_packed_sites(data, packed_sites, pos):
+    """leftmost (start, end) of any packed site in data[pos:] or None"""
+    best = None
+    for (length, hits) in _packed_site_hits(data[pos:], packed_sites):
+        # lengths are decreasing, so ties keep the longest site
+        if len(hits) > 0 and (best is None or hits[0] < best[0]):
+            best = (int(hits[0]), length)
+    if best is None:
+        return None
+    return (pos + best[0], pos + best[0] + best[1])
+
+
+def _find_sites(data, sites, pos):
+    """leftmost (start, end) of any of the sites in data[pos:] or None
+
+    For sites starting at the same position, the longest one is reported.
+
+    data is a str; sites is a tuple of str
+    """
+    if len(sites) >= _PACKED_SEARCH_MIN_SITES:
+        packed_sites = _packed_sites(sites)
+        if packed_sites is not None:
+            return _find_packed_sites(data, packed_sites, pos)
+    match = _sites_pattern(sites).search(data, pos)
+    if match is None:
+        return None
+    return match.span()
+
+
+def _site_starts(data, sites):
+    """int array of start coords of site occurrences in data
+
+    Not every overlapping occurrence is reported, but every stretch of
+    overlapping occurrences contributes at least one start.
+
+    data is a str; sites is a tuple of str
+    """
+    if len(sites) >= _PACKED_SEARCH_MIN_SITES:
+        packed_sites = _packed_sites(sites)
+        if packed_sites is not None:
+            hits = [hits for (_, hits) in _packed_site_hits(data, packed_sites)]
+            return np.concatenate([np.zeros(0, dtype=np.intp)] + hits)
+    starts = [match.start() for match in _sites_pattern(sites).finditer(data)]
+    return np.asarray(starts, dtype=np.intp)
+
+
 def recode_sites_from_cds(
     seq, sites, codon_sampler, cds_start=None, cds_end=None, search_start=None
 ):
@@ -236,31 +498,124 @@ def recode_sites_from_cds(
     if (cds_end - cds_start) % 3 != 0:
         raise PepsynError("CDS length is not multiple of 3")
 
-    # initial search for site; handle recursion breaking cases here
-    # search for all potential sites
-    search_results = [(seq.find(site, search_start), len(site)) for site in sites]
-    # filter out sites that don't match
-    positive_matches = [tup for tup in search_results if tup[0] >= 0]
-    if len(positive_matches) == 0:
+    if len(sites) == 0:
         return seq
-    # choose earliest matching site coord
-    site_start = min([tup[0] for tup in positive_matches])
-    # for any site that starts at site_start (could be multiple), choose the
-    # largest site length
-    site_end = site_start + max(
-        [tup[1] for tup in positive_matches if tup[0] == site_start]
-    )
-    if site_end <= cds_start or site_start >= cds_end:
-        # sites don't overlap the CDS => move on further down the seq
-        return recode_sites_from_cds(
-            seq,
-            sites,
-            codon_sampler,
-            cds_start=cds_start,
-            cds_end=cds_end,
-            search_start=(site_start + 1),
+    sites = tuple(str(site) for site in sites)
+    data = str(seq)
+    # resampling attempts per site start; sites that keep recreating each
+    # other at different starts still run out of attempts
+    attempts = Counter()
+    while True:
+        # a single scan finds the earliest matching site coord; for any sites
+        # that start there (could be multiple), it reports the largest one
+        span = _find_sites(data, sites, search_start)
+        if span is None:
+            break
+        (site_start, site_end) = span
+        if site_end <= cds_start or site_start >= cds_end:
+            # sites don't overlap the CDS => move on further down the seq
+            search_start = site_start + 1
+            continue
+        # site needs to be recoded
+        attempts[site_start] += 1
+        if attempts[site_start] > _MAX_RECODE_ATTEMPTS:
+            raise PepsynError(
+                "failed to recode site {} out of the CDS".format(
+                    data[site_start:site_end]
+                )
+            )
+        data = _recode_span(
+            data, site_start, site_end, cds_start, cds_end, codon_sampler
+        )
+    if len(attempts) == 0:
+        return seq
+    return _like(seq, data)
+
+
+def recode_sites_from_cds_batch(
+    seqs, sites, codon_sampler, cds_starts=None, cds_ends=None
+):
+    """recode_sites_from_cds over many sequences
+
+    seqs is a list[Bio.Seq.Seq]
+    sites is a list[Bio.Seq.Seq]
+    codon_sampler is a CodonSampler
+    cds_starts, cds_ends are list[int]; default to full seqs
+
+    All sequences are scanned for sites in a single pass over one contiguous
+    buffer; only the sequences containing a site are recoded, the rest are
+    returned as is.
+    """
+    # validate input
+    cds_starts = cds_starts if cds_starts is not None else [0] * len(seqs)
+    cds_ends = cds_ends if cds_ends is not None else [len(seq) for seq in seqs]
+    if not len(seqs) == len(cds_starts) == len(cds_ends):
+        raise ValueError("need one CDS start and end for each sequence")
+    for (cds_start, cds_end) in zip(cds_starts, cds_ends):
+        if (cds_end - cds_start) % 3 != 0:
+            raise PepsynError("CDS length is not multiple of 3")
+
+    recoded = list(seqs)
+    if len(sites) == 0:
+        return recoded
+    sites = tuple(str(site) for site in sites)
+    # the separator is not a nucleotide, so no site spans two sequences
+    data = [str(seq) for seq in seqs]
+    offsets = np.cumsum([0] + [len(d) + 1 for d in data])
+    hit_starts = _site_starts("\n".join(data), sites)
+    hit_rows = np.unique(np.searchsorted(offsets, hit_starts, side="right") - 1)
+    for i in hit_rows.tolist():
+        recoded[i] = recode_sites_from_cds(
+            seqs[i], sites, codon_sampler, cds_starts[i], cds_ends[i]
         )
-    # site needs to be recoded
+    return recoded
+
+
+def recode_site_from_cds(
+    seq, site, codon_sampler, cds_start=None, cds_end=None, search_start=None
+):
+    """
+    seq is a Bio.Seq.Seq
+    site is a Bio.Seq.Seq
+    codon_sampler is a CodonSampler
+    cds_start, cds_end are int; defaults to full seq; defines recodable region
+    search_start is int; default full seq; where to start search for sites
+    """
+    # validate input
+    search_start = search_start if search_start is not None else 0
+    cds_start = cds_start if cds_start is not None else 0
+    cds_end = cds_end if cds_end is not None else len(seq)
+    if (cds_end - cds_start) % 3 != 0:
+        raise PepsynError("CDS length is not multiple of 3")
+
+    data = str(seq)
+    site = str(site)
+    # only occurrences overlapping the CDS can be recoded (or be created by
+    # recoding), so restrict the search to that window
+    window_start = max(search_start, cds_start - len(site) + 1, 0)
+    window_end = cds_end + len(site) - 1
+    site_start = data.find(site, window_start, window_end)
+    if site_start < 0:
+        return seq
+    # resampling attempts per site start, so every occurrence gets its own
+    # budget and the total is still bounded
+    attempts = Counter()
+    while site_start >= 0:
+        attempts[site_start] += 1
+        if attempts[site_start] > _MAX_RECODE_ATTEMPTS:
+            raise PepsynError("failed to recode site {} out of the CDS".format(site))
+        data = _recode_span(
+            data, site_start, site_start + len(site), cds_start, cds_end, codon_sampler
+        )
+        site_start = data.find(site, window_start, window_end)
+    return _like(seq, data)
+
+
+def _recode_span(data, site_start, site_end, cds_start, cds_end, codon_sampler):
+    """recode the codons of the CDS that overlap data[site_start:site_end]
+
+    data is a str; returns the recoded str
+    """
     # computes offsets for the site boundaries to align them to coding frame
     start_offset = (site_start - cds_start) % 3
     # negative because the end coord must be pushed to the right
@@ -268,31 +623,9 @@ def recode_sites_from_cds(
     recode_start = max(site_start - start_offset, cds_start)
     recode_end = min(site_end + end_offset, cds_end)
     # compute candidate recoded sequence
-    recoded_chunk = recode(seq[recode_start:recode_end], codon_sampler)
-    candidate = seq[:recode_start] + recoded_chunk + seq[recode_end:]
-    # TODO: this can cause a maximum recursion error if it never finds a
-    # recoded sequence without the site recursively
-    return recode_sites_from_cds(
-        candidate,
-        sites,
-        codon_sampler,
-        cds_start=cds_start,
-        cds_end=cds_end,
-        search_start=search_start,
-    )
-
-
-def recode_site_from_cds(
-    seq, site, codon_sampler, cds_start=None, cds_end=None, search_start=None
-):
-    return recode_sites_from_cds(
-        seq,
-        [site],
-        codon_sampler,
-        cds_start=cds_start,
-        cds_end=cds_end,
-        search_start=search_start,
-    )
+    chunk = Seq(data[recode_start:recode_end], codon_sampler.nucleotide_alphabet)
+    recoded_chunk = str(recode(chunk, codon_sampler))
+    return data[:recode_start] + recoded_chunk + data[recode_end:]
 
 
 def orf_stats(orfs):
@@ -300,8 +633,6 @@ def orf_stats(orfs):
 
     orfs is name->seq dicts
     """
-    import numpy as np
-
     orf_lens = np.asarray([len(o) for o in orfs.values()])
     ambiguity_factors = {n: num_disambiguated_iupac_aa(s) for (n, s) in orfs.items()}
     stats = {}
@@ -335,8 +666,6 @@ def tile_stats(orfs, tiles):
     NOTE: for prefix trie stats (e.g., num of tiles per orf), it is assumed the
     orf name is a prefix to the name of a tile from that orf
     """
-    import numpy as np
-
     tile_lens = np.asarray([len(t) for t in tiles.values()])
     orf_lens = np.asarray([len(o) for o in orfs.values()])
     tile_size = int(round(np.median(tile_lens)).tolist())
@@ -12,12 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import warnings
 from math import isclose
 
+import numpy as np
 from Bio.Data.CodonTable import standard_dna_table
 
 from pepsyn.codons import (
+    CodonSampler,
+    FreqWeightedCodonSampler,
+    UniformCodonSampler,
+    alias_table,
     amber_codon,
     ecoli_codon_usage,
     ochre_codon,
@@ -29,18 +33,69 @@ from pepsyn.codons import (
 
 class TestUsageManipulation(object):
     def test_zero_non_amber(self):
-        with warnings.catch_warnings():  # biopython Seq.__hash__
-            warnings.simplefilter("ignore")
-
-            zeroed_weight = (
-                ecoli_codon_usage.freq[ochre_codon] + ecoli_codon_usage.freq[opal_codon]
-            )
-            new_usage = zero_non_amber_stops(ecoli_codon_usage)
-            for codon in new_usage.freq:
-                if codon == ochre_codon or codon == opal_codon:
-                    continue
-                inflated_freq = ecoli_codon_usage.freq[codon] / (1 - zeroed_weight)
-                new_freq = new_usage.freq[codon]
-                assert isclose(new_freq, inflated_freq)
-            assert new_usage.freq[ochre_codon] == 0
-            assert new_usage.freq[opal_codon] == 0
+        ochre = str(ochre_codon)
+        opal = str(opal_codon)
+        zeroed_weight = ecoli_codon_usage.freq[ochre] + ecoli_codon_usage.freq[opal]
+        new_usage = zero_non_amber_stops(ecoli_codon_usage)
+        for codon in new_usage.freq:
+            if codon == ochre or codon == opal:
+                continue
+            inflated_freq = ecoli_codon_usage.freq[codon] / (1 - zeroed_weight)
+            new_freq = new_usage.freq[codon]
+            assert isclose(new_freq, inflated_freq)
+        assert new_usage.freq[ochre] == 0
+        assert new_usage.freq[opal] == 0
+
+    def test_zero_low_freq(self):
+        new_usage = zero_low_freq_codons(ecoli_codon_usage, standard_dna_table)
+        # AGG is a rare arginine codon in E. coli
+        assert ecoli_codon_usage.freq["AGG"] < 0.01
+        assert new_usage.freq["AGG"] == 0
+        assert new_usage.freq["CGT"] > ecoli_codon_usage.freq["CGT"]
+
+
+class TestSampling(object):
+    def test_alias_table(self):
+        p = np.asarray([0.5, 0.0, 0.3, 0.2])
+        (prob, alias) = alias_table(p)
+        # reconstruct the distribution from the table
+        q = prob / len(p)
+        for (i, a) in enumerate(alias):
+            q[a] += (1 - prob[i]) / len(p)
+        assert np.allclose(p, q)
+
+    def test_freq_weighted_sample_codon(self):
+        codon_sampler = FreqWeightedCodonSampler(usage=ecoli_codon_usage)
+        np.random.seed(0)
+        codons = [str(codon_sampler.sample_codon("L")) for _ in range(20000)]
+        for (codon, p) in zip(codon_sampler.aa2codons["L"], codon_sampler.aa2p["L"]):
+            assert isclose(codons.count(str(codon)) / len(codons), p, abs_tol=0.02)
+
+    def test_freq_weighted_sample_codons(self):
+        codon_sampler = FreqWeightedCodonSampler(usage=ecoli_codon_usage)
+        np.random.seed(0)
+        aas = np.full(20000, ord("L"), dtype=np.uint8)
+        codons = codon_sampler.sample_codons(aas).tobytes().decode("ascii")
+        codons = [codons[i : i + 3] for i in range(0, len(codons), 3)]
+        for (codon, p) in zip(codon_sampler.aa2codons["L"], codon_sampler.aa2p["L"]):
+            assert isclose(codons.count(str(codon)) / len(codons), p, abs_tol=0.02)
+
+    def test_uniform_sample_codons(self):
+        codon_sampler = UniformCodonSampler()
+        np.random.seed(0)
+        aas = np.full(20000, ord("L"), dtype=np.uint8)
+        codons = codon_sampler.sample_codons(aas).tobytes().decode("ascii")
+        codons = [codons[i : i + 3] for i in range(0, len(codons), 3)]
+        for codon in codon_sampler.aa2codons["L"]:
+            assert isclose(codons.count(str(codon)) / len(codons), 1 / 6, abs_tol=0.02)
+
+    def test_custom_sample_codon(self):
+        # subclasses that only override sample_codon are still honored
+        class FirstCodonSampler(CodonSampler):
+            def sample_codon(self, aa):
+                return self.aa2codons[aa][0]
+
+        codon_sampler = FirstCodonSampler()
+        aas = np.frombuffer(b"LLLLLL", dtype=np.uint8)
+        codons = codon_sampler.sample_codons(aas).tobytes().decode("ascii")
+        assert codons == str(codon_sampler.aa2codons["L"][0]) * 6
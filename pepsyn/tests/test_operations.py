@@ -12,12 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import warnings
+from itertools import product
 
 import numpy as np
 from Bio.Alphabet.IUPAC import ambiguous_dna, protein, unambiguous_dna
+from Bio.Data.CodonTable import ambiguous_dna_by_id
 from Bio.Seq import Seq
-from pytest import raises
+from pytest import fixture, raises
 
 from pepsyn.codons import (
     FreqWeightedCodonSampler,
@@ -32,110 +33,217 @@ from pepsyn.operations import (
     num_disambiguated_iupac_aa,
     num_disambiguated_iupac_dna,
     pad_ggsg,
+    recode,
     recode_site_from_cds,
     recode_sites_from_cds,
+    recode_sites_from_cds_batch,
     reverse_translate,
+    reverse_translate_deterministic,
     tile,
+    tile_and_translate,
     x_to_ggsg,
 )
 
-protein_seq = Seq("METMSDYSKEVSEALSALRGELSALSAAISNTVRAGSYSAPVAKDCKAGHCDSKAVL", protein)
-short_protein_seq = Seq("METMSD", protein)
-all_aa_protein_seq = Seq("ACDEFGHIKLMNPQRSTVWY", protein)
+PROTEIN_SEQ = "METMSDYSKEVSEALSALRGELSALSAAISNTVRAGSYSAPVAKDCKAGHCDSKAVL"
+SHORT_PROTEIN_SEQ = "METMSD"
+ALL_AA_PROTEIN_SEQ = "ACDEFGHIKLMNPQRSTVWY"
+
+
+@fixture(scope="module")
+def protein_seq():
+    return Seq(PROTEIN_SEQ, protein)
+
+
+@fixture(scope="module")
+def short_protein_seq():
+    return Seq(SHORT_PROTEIN_SEQ, protein)
+
+
+@fixture(scope="module")
+def all_aa_protein_seq():
+    return Seq(ALL_AA_PROTEIN_SEQ, protein)
 
 
 class TestTile(object):
-    def test_nonoverlapping_perfect(self):
+    def test_nonoverlapping_perfect(self, protein_seq):
         length = 19
         overlap = 0
         tiles = [t[2] for t in tile(protein_seq, length, overlap)]
         assert len(tiles) == 3
         assert all([len(t) == length for t in tiles])
-        assert tiles[0] == Seq("METMSDYSKEVSEALSALR", protein)
-        assert tiles[1] == Seq("GELSALSAAISNTVRAGSY", protein)
-        assert tiles[2] == Seq("SAPVAKDCKAGHCDSKAVL", protein)
+        assert tiles[0] == "METMSDYSKEVSEALSALR"
+        assert tiles[1] == "GELSALSAAISNTVRAGSY"
+        assert tiles[2] == "SAPVAKDCKAGHCDSKAVL"
         assert sum(tiles, Seq("", protein)) == protein_seq
 
-    def test_nonoverlapping_imperfect(self):
+    def test_nonoverlapping_imperfect(self, protein_seq):
         length = 25
         overlap = 0
         tiles = [t[2] for t in tile(protein_seq, length, overlap)]
         assert len(tiles) == 2
         assert all([len(t) == length for t in tiles])
-        assert tiles[0] == Seq("METMSDYSKEVSEALSALRGELSAL", protein)
-        assert tiles[1] == Seq("SAAISNTVRAGSYSAPVAKDCKAGH", protein)
+        assert tiles[0] == "METMSDYSKEVSEALSALRGELSAL"
+        assert tiles[1] == "SAAISNTVRAGSYSAPVAKDCKAGH"
         assert sum(tiles, Seq("", protein)) == protein_seq[:50]
 
-    def test_overlapping_perfect(self):
+    def test_overlapping_perfect(self, protein_seq):
         length = 21
         overlap = 3
         tiles = [t[2] for t in tile(protein_seq, length, overlap)]
         assert len(tiles) == 3
         assert all([len(t) == length for t in tiles])
-        assert tiles[0] == Seq("METMSDYSKEVSEALSALRGE", protein)
-        assert tiles[1] == Seq("RGELSALSAAISNTVRAGSYS", protein)
-        assert tiles[2] == Seq("SYSAPVAKDCKAGHCDSKAVL", protein)
+        assert tiles[0] == "METMSDYSKEVSEALSALRGE"
+        assert tiles[1] == "RGELSALSAAISNTVRAGSYS"
+        assert tiles[2] == "SYSAPVAKDCKAGHCDSKAVL"
 
-    def test_overlapping_imperfect(self):
+    def test_overlapping_imperfect(self, protein_seq):
         length = 22
         overlap = 3
         tiles = [t[2] for t in tile(protein_seq, length, overlap)]
         assert len(tiles) == 2
         assert all([len(t) == length for t in tiles])
-        assert tiles[0] == Seq("METMSDYSKEVSEALSALRGEL", protein)
-        assert tiles[1] == Seq("GELSALSAAISNTVRAGSYSAP", protein)
+        assert tiles[0] == "METMSDYSKEVSEALSALRGEL"
+        assert tiles[1] == "GELSALSAAISNTVRAGSYSAP"
 
-    def test_length_longer_than_seq(self):
+    def test_length_longer_than_seq(self, protein_seq):
         length = len(protein_seq) + 5
         overlap = 5
         tiles = list(tile(protein_seq, length, overlap))
         assert len(tiles) == 0
 
-    def test_overlap_longer_than_length(self):
+    def test_overlap_longer_than_length(self, protein_seq):
         length = 10
         overlap = 15
         with raises(ValueError):
             tiles = list(tile(protein_seq, length, overlap))
 
-    def test_negative_length(self):
+    def test_negative_length(self, protein_seq):
         length = -10
         overlap = 5
         with raises(ValueError):
             tiles = list(tile(protein_seq, length, overlap))
 
-    def test_zero_length(self):
+    def test_zero_length(self, protein_seq):
         length = 0
         overlap = 5
         with raises(ValueError):
             tiles = list(tile(protein_seq, length, overlap))
 
-    def test_negative_overlap(self):
+    def test_negative_overlap(self, protein_seq):
         length = 20
         overlap = -3
         with raises(ValueError):
             tiles = list(tile(protein_seq, length, overlap))
 
-    def test_short_protein(self):
+    def test_short_protein(self, short_protein_seq):
         length = 56
         overlap = 2
         assert len(list(tile(short_protein_seq, length, overlap))) == 0
         overlap = 20
         assert len(list(tile(short_protein_seq, length, overlap))) == 0
 
+    def test_str_input(self):
+        tiles = [t[2] for t in tile(PROTEIN_SEQ, 19, 0)]
+        assert all([isinstance(t, str) for t in tiles])
+        assert "".join(tiles) == PROTEIN_SEQ
+
+
+class TestTileAndTranslate(object):
+    def test_matches_translated_tiles(self, protein_seq):
+        codon_sampler = UniformCodonSampler()
+        dna_seq = reverse_translate(protein_seq, codon_sampler)
+        for (length, overlap) in [(57, 0), (63, 9), (66, 9)]:
+            tiles = [
+                (start, end, t.translate(table=codon_sampler.table))
+                for (start, end, t) in tile(dna_seq, length, overlap)
+            ]
+            translated_tiles = list(
+                tile_and_translate(dna_seq, length, overlap, codon_sampler.table)
+            )
+            assert translated_tiles == tiles
+
+    def test_incomplete_codon(self):
+        # trailing partial codon is ignored
+        translated_tiles = list(tile_and_translate("ATGGAAACCTAAGC", 6, 3))
+        assert translated_tiles == [(0, 6, "ME"), (3, 9, "ET"), (6, 12, "T*")]
+
+    def test_ambiguous_codons(self):
+        dna_seq = Seq("ATGNNNAAARAY", ambiguous_dna)
+        tiles = [
+            (start, end, t.translate()) for (start, end, t) in tile(dna_seq, 3, 0)
+        ]
+        for table in [None, ambiguous_dna_by_id[1]]:
+            translated_tiles = list(tile_and_translate(dna_seq, 3, 0, table))
+            assert translated_tiles == tiles
+            translated_tiles = list(tile_and_translate("ATGNNNAAA", 3, 0, table))
+            assert translated_tiles == [(0, 3, "M"), (3, 6, "X"), (6, 9, "K")]
+
+    def test_ambiguous_table(self):
+        translated_tiles = list(
+            tile_and_translate("ATGGAAACCTAA", 6, 3, ambiguous_dna_by_id[1])
+        )
+        assert translated_tiles == [(0, 6, "ME"), (3, 9, "ET"), (6, 12, "T*")]
+
+    def test_out_of_frame(self):
+        with raises(ValueError):
+            list(tile_and_translate("ATGGAAACCTAA", 5, 3))
+        with raises(ValueError):
+            list(tile_and_translate("ATGGAAACCTAA", 6, 2))
+
 
 class TestReverseTranslate(object):
-    def test_freq_weighted_sampler(self):
-        with warnings.catch_warnings():  # biopython Seq.__hash__
-            warnings.simplefilter("ignore")
-            codon_sampler = FreqWeightedCodonSampler(usage=ecoli_codon_usage)
+    def test_freq_weighted_sampler(self, all_aa_protein_seq):
+        codon_sampler = FreqWeightedCodonSampler(usage=ecoli_codon_usage)
         dna_seq = reverse_translate(all_aa_protein_seq, codon_sampler)
         assert dna_seq.translate(table=codon_sampler.table) == all_aa_protein_seq
 
-    def test_uniform_sampler(self):
+    def test_uniform_sampler(self, all_aa_protein_seq):
         codon_sampler = UniformCodonSampler()
         dna_seq = reverse_translate(all_aa_protein_seq, codon_sampler)
         assert dna_seq.translate(table=codon_sampler.table) == all_aa_protein_seq
 
+    def test_deterministic(self, all_aa_protein_seq):
+        codon_sampler = FreqWeightedCodonSampler(usage=ecoli_codon_usage)
+        dna_seq = reverse_translate_deterministic(all_aa_protein_seq, codon_sampler)
+        assert dna_seq.translate(table=codon_sampler.table) == all_aa_protein_seq
+        assert dna_seq == reverse_translate_deterministic(
+            all_aa_protein_seq, codon_sampler
+        )
+        # CTG is the most frequent E. coli leucine codon
+        dna_seq = reverse_translate_deterministic(Seq("L", protein), codon_sampler)
+        assert dna_seq == "CTG"
+
+    def test_deterministic_unknown_residue(self):
+        codon_sampler = UniformCodonSampler()
+        with raises(ValueError):
+            reverse_translate_deterministic(Seq("AXA", protein), codon_sampler)
+
+    def test_unknown_residue(self):
+        codon_sampler = UniformCodonSampler()
+        with raises(ValueError):
+            reverse_translate(Seq("AXA", protein), codon_sampler)
+
+    def test_recode(self):
+        codon_sampler = UniformCodonSampler()
+        dna_seq = Seq("ATGGAAACCTAAGCGTGGTGA", unambiguous_dna)
+        recoded = recode(dna_seq, codon_sampler)
+        assert recoded.translate(table=codon_sampler.table) == dna_seq.translate(
+            table=codon_sampler.table
+        )
+
+    def test_recode_lowercase(self):
+        codon_sampler = UniformCodonSampler()
+        dna_seq = Seq("atggaaacc", unambiguous_dna)
+        recoded = recode(dna_seq, codon_sampler)
+        assert recoded.translate(table=codon_sampler.table) == "MET"
+
+    def test_repeated_residues(self, all_aa_protein_seq):
+        codon_sampler = UniformCodonSampler()
+        repeated_seq = all_aa_protein_seq * 10
+        dna_seq = reverse_translate(repeated_seq, codon_sampler)
+        assert len(dna_seq) == 3 * len(repeated_seq)
+        assert dna_seq.translate(table=codon_sampler.table) == repeated_seq
+
 
 class TestSiteRemoval(object):
 
@@ -144,9 +252,7 @@ class TestSiteRemoval(object):
     cds_end = 28
     EcoRI = Seq("GAATTC", unambiguous_dna)
     HindIII = Seq("AAGCTT", unambiguous_dna)
-    with warnings.catch_warnings():  # biopython Seq.__hash__
-        warnings.simplefilter("ignore")
-        codon_sampler = FreqWeightedCodonSampler(usage=ecoli_codon_usage)
+    codon_sampler = FreqWeightedCodonSampler(usage=ecoli_codon_usage)
 
     def test_no_site(self):
         dna_seq = Seq("GAGATCCGGTCCATATCTTATTCAACGCAAGTTGTTAT", unambiguous_dna)
@@ -174,6 +280,12 @@ class TestSiteRemoval(object):
         assert new_seq[self.cds_end :] == dna_seq[self.cds_end :]
         assert new_trans == orig_trans
 
+    def test_with_repeated_site_in_cds(self):
+        dna_seq = Seq("GAATTC" * 1200, unambiguous_dna)
+        new_seq = recode_site_from_cds(dna_seq, self.EcoRI, self.codon_sampler)
+        assert new_seq.find(self.EcoRI) == -1
+        assert new_seq.translate() == dna_seq.translate()
+
     def test_with_two_sites_in_cds(self):
         dna_seq = Seq("GAGATCCGGTCAAGCTTGAATTCAACGCAAGTTGTTAT", unambiguous_dna)
         new_seq = recode_sites_from_cds(
@@ -197,6 +309,67 @@ class TestSiteRemoval(object):
         assert new_seq[self.cds_end :] == dna_seq[self.cds_end :]
         assert new_trans == orig_trans
 
+    def test_with_many_sites_in_cds(self):
+        # large enzyme panels take a different search path
+        decoys = [
+            Seq("TTTTTTTTT" + "".join(nts), unambiguous_dna)
+            for nts in product("ACGT", repeat=3)
+        ]
+        sites = [self.EcoRI, self.HindIII] + decoys
+        dna_seq = Seq("GAGATCCGGTCAAGCTTGAATTCAACGCAAGTTGTTAT", unambiguous_dna)
+        new_seq = recode_sites_from_cds(
+            dna_seq, sites, self.codon_sampler, self.cds_start, self.cds_end
+        )
+        orig_trans = dna_seq[self.cds_start : self.cds_end].translate(
+            table=self.codon_sampler.table
+        )
+        new_trans = new_seq[self.cds_start : self.cds_end].translate(
+            table=self.codon_sampler.table
+        )
+        assert new_seq.find(self.EcoRI) == -1
+        assert new_seq.find(self.HindIII) == -1
+        assert new_seq[: self.cds_start] == dna_seq[: self.cds_start]
+        assert new_seq[self.cds_end :] == dna_seq[self.cds_end :]
+        assert new_trans == orig_trans
+
+    def test_batch(self):
+        dna_seqs = [
+            Seq("GAGATCCGGTCCATATCTTATTCAACGCAAGTTGTTAT", unambiguous_dna),
+            Seq("GAGATCCGGTCAAGCTTGAATTCAACGCAAGTTGTTAT", unambiguous_dna),
+            Seq("GAGATCCGGTCCATATCTTATTCAACGCAAGAATTCAT", unambiguous_dna),
+            Seq("GAGATCCGGTCCATATCGAATTCAACGCAAGTTGTTAT", unambiguous_dna),
+        ]
+        new_seqs = recode_sites_from_cds_batch(
+            dna_seqs,
+            [self.EcoRI, self.HindIII],
+            self.codon_sampler,
+            [self.cds_start] * len(dna_seqs),
+            [self.cds_end] * len(dna_seqs),
+        )
+        assert len(new_seqs) == len(dna_seqs)
+        # sequences without sites in the CDS are left alone
+        assert new_seqs[0] is dna_seqs[0]
+        assert new_seqs[2] == dna_seqs[2]
+        for (dna_seq, new_seq) in zip(dna_seqs[1::2], new_seqs[1::2]):
+            orig_trans = dna_seq[self.cds_start : self.cds_end].translate(
+                table=self.codon_sampler.table
+            )
+            new_trans = new_seq[self.cds_start : self.cds_end].translate(
+                table=self.codon_sampler.table
+            )
+            assert new_seq.find(self.EcoRI) == -1
+            assert new_seq.find(self.HindIII) == -1
+            assert new_seq[: self.cds_start] == dna_seq[: self.cds_start]
+            assert new_seq[self.cds_end :] == dna_seq[self.cds_end :]
+            assert new_trans == orig_trans
+
+    def test_batch_bad_cds(self):
+        dna_seq = Seq("GAGATCCGGTCCATATCTTATTCAACGCAAGTTGTTAT", unambiguous_dna)
+        with raises(PepsynError):
+            recode_sites_from_cds_batch(
+                [dna_seq], [self.EcoRI], self.codon_sampler, [10], [27]
+            )
+
     def test_with_site_on_left_boundary(self):
         dna_seq = Seq("GAGATCCGGAATTCATCTTATTCAACGCAAGTTGTTAT", unambiguous_dna)
         new_seq = recode_site_from_cds(
@@ -251,6 +424,32 @@ class TestSiteRemoval(object):
                 dna_seq, self.EcoRI, self.codon_sampler, cds_start, cds_end
             )
 
+    def test_unrecodable_site(self):
+        # Met has a single codon, so the site can never be recoded away
+        site = Seq("ATGATG", unambiguous_dna)
+        dna_seq = Seq("GAGATCCGGTCCAATGATGTTATTCAACGCAAGTTGT", unambiguous_dna)
+        with raises(PepsynError):
+            new_seq = recode_site_from_cds(
+                dna_seq, site, self.codon_sampler, self.cds_start, self.cds_end
+            )
+        with raises(PepsynError):
+            new_seq = recode_sites_from_cds(
+                dna_seq,
+                [self.EcoRI, site],
+                self.codon_sampler,
+                self.cds_start,
+                self.cds_end,
+            )
+        # recoding either site can only recreate the other one
+        with raises(PepsynError):
+            new_seq = recode_sites_from_cds(
+                Seq("ATGTTT", unambiguous_dna),
+                [Seq("ATGTTT", unambiguous_dna), Seq("TGTTC", unambiguous_dna)],
+                UniformCodonSampler(),
+                0,
+                6,
+            )
+
 
 class TestLinkerReplacement(object):
     def test_null_seq(self):
@@ -309,12 +508,17 @@ class TestLinkerReplacement(object):
         r = x_to_ggsg(p)
         assert r == Seq("GYTGGSGGGSGGTRS", protein)
 
+    def test_long_X_stretch(self):
+        p = Seq("GY" + "X" * 70 + "TRS", protein)
+        r = x_to_ggsg(p)
+        assert r == Seq("GY" + ("GGSG" * 18)[:70] + "TRS", protein)
+
 
 class TestProteinDisambig(object):
-    def test_unambig(self):
+    def test_unambig(self, all_aa_protein_seq):
         proteins = list(disambiguate_iupac_aa(all_aa_protein_seq))
         assert len(proteins) == 1
-        assert proteins[0] == all_aa_protein_seq
+        assert proteins[0] is all_aa_protein_seq
 
     def test_B(self):
         ambig = Seq("AABAA", protein)
@@ -324,7 +528,7 @@ class TestProteinDisambig(object):
     def test_X(self):
         ambig = Seq("AAXAA", protein)
         disambig = {str(p) for p in disambiguate_iupac_aa(ambig)}
-        assert disambig == {"AA{}AA".format(aa) for aa in all_aa_protein_seq}
+        assert disambig == {"AA{}AA".format(aa) for aa in ALL_AA_PROTEIN_SEQ}
 
     def test_Z(self):
         ambig = Seq("AAZAA", protein)
@@ -359,7 +563,7 @@ class TestDNADisambig(object):
         unambig_dna_seq = Seq("AGCTTCGAAATGCT", unambiguous_dna)
         seqs = list(disambiguate_iupac_dna(unambig_dna_seq))
         assert len(seqs) == 1
-        assert seqs[0] == unambig_dna_seq
+        assert seqs[0] is unambig_dna_seq
 
     def test_ambig_dna(self):
         ambig_dna_seq = Seq("NGCTT", ambiguous_dna)
@@ -381,6 +585,7 @@ class TestNumDisambig(object):
         assert num_disambiguated_iupac_aa(Seq("AAZAB", protein)) == 4
         assert num_disambiguated_iupac_aa(Seq("XAZAA", protein)) == 40
         assert num_disambiguated_iupac_aa("AABAA") == 2
+        assert num_disambiguated_iupac_aa("X" * 20) == 20 ** 20
 
     def test_dna(self):
         assert num_disambiguated_iupac_dna(Seq("ACGT", ambiguous_dna)) == 1
@@ -405,41 +610,55 @@ class TestNumDisambig(object):
 
 
 class TestPad(object):
-    def test_n_term_pad(self):
-        padded = pad_ggsg(short_protein_seq, len(short_protein_seq) + 5, "N")
+    def test_n_term_pad(self, short_protein_seq):
+        padded = pad_ggsg(short_protein_seq, len(SHORT_PROTEIN_SEQ) + 5, "N")
         assert padded == "GGSGG" + short_protein_seq
 
-    def test_c_term_pad(self):
-        padded = pad_ggsg(short_protein_seq, len(short_protein_seq) + 7, "C")
+    def test_c_term_pad(self, short_protein_seq):
+        padded = pad_ggsg(short_protein_seq, len(SHORT_PROTEIN_SEQ) + 7, "C")
         assert padded == short_protein_seq + "GGSGGGS"
 
-    def test_long_seq(self):
-        padded = pad_ggsg(short_protein_seq, len(short_protein_seq) - 3, "C")
+    def test_long_pad(self, short_protein_seq):
+        padded = pad_ggsg(short_protein_seq, len(SHORT_PROTEIN_SEQ) + 70, "C")
+        assert padded == short_protein_seq + ("GGSG" * 18)[:70]
+
+    def test_long_seq(self, short_protein_seq):
+        padded = pad_ggsg(short_protein_seq, len(SHORT_PROTEIN_SEQ) - 3, "C")
         assert padded == short_protein_seq
 
-    def test_exact_len_seq(self):
-        padded = pad_ggsg(short_protein_seq, len(short_protein_seq), "C")
+    def test_exact_len_seq(self, short_protein_seq):
+        padded = pad_ggsg(short_protein_seq, len(SHORT_PROTEIN_SEQ), "C")
         assert padded == short_protein_seq
 
-    def test_nonsense_terminus(self):
+    def test_nonsense_terminus(self, short_protein_seq):
         with raises(ValueError):
             # note lowercase 'c'
-            padded = pad_ggsg(short_protein_seq, len(short_protein_seq) + 5, "c")
+            padded = pad_ggsg(short_protein_seq, len(SHORT_PROTEIN_SEQ) + 5, "c")
+
+    def test_str_input(self):
+        padded = pad_ggsg(SHORT_PROTEIN_SEQ, len(SHORT_PROTEIN_SEQ) + 5, "N")
+        assert padded == "GGSGG" + SHORT_PROTEIN_SEQ
+        assert isinstance(padded, str)
 
 
 class TestCTermPep(object):
-    def test_short_seq(self):
+    def test_short_seq(self, short_protein_seq):
         peptide = ctermpep(short_protein_seq, 15)
         assert peptide == short_protein_seq
 
-    def test_short_seq_with_stop(self):
+    def test_short_seq_with_stop(self, short_protein_seq):
         peptide = ctermpep(short_protein_seq, 15, add_stop=True)
         assert peptide == short_protein_seq + "*"
 
-    def test_cterm_pep(self):
+    def test_cterm_pep(self, protein_seq):
         peptide = ctermpep(protein_seq, 5)
         assert peptide == protein_seq[-5:]
 
-    def test_add_stop(self):
+    def test_add_stop(self, protein_seq):
         peptide = ctermpep(protein_seq, 5, add_stop=True)
         assert peptide == protein_seq[-4:] + "*"
+
+    def test_str_input(self):
+        peptide = ctermpep(PROTEIN_SEQ, 5, add_stop=True)
+        assert peptide == PROTEIN_SEQ[-4:] + "*"
+        assert isinstance(peptide, str)
@@ -33,6 +33,6 @@ setup(
     license="Apache License, Version 2.0",
     classifiers=["Programming Language :: Python :: 3"],
     packages=find_packages(),
-    install_requires=["click", "tqdm", "biopython", "pyyaml", "pygtrie"],
+    install_requires=["click", "tqdm", "biopython", "numpy", "pyyaml", "pygtrie"],
     entry_points={"console_scripts": ["pepsyn = pepsyn.cli:cli"]},
 )